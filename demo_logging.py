@@ -21,15 +21,25 @@ def demo_logging():
     app.log_message("This is a warning message", "WARNING")  
     app.log_message("This is an error message", "ERROR")
     app.log_message("This is a debug message", "DEBUG")
+    app.log_message("Arguments are formatted lazily: %d of %d items", "INFO", 3, 10)
+    
+    # Records are written by a background listener; wait for them to land
+    app.flush_logging()
     
     # Check if log file exists
     log_file = app.log_file_path
-    if os.path.exists(log_file):
+    try:
+        st = os.stat(log_file)
+    except FileNotFoundError:
+        st = None
+        
+    if st:
         print(f"✅ Log file created at: {log_file}")
         
-        # Show last few lines of log
-        with open(log_file, 'r') as f:
-            lines = f.readlines()
+        # Show last few lines of log, reading only the tail of the file
+        with open(log_file, 'rb') as f:
+            f.seek(max(0, st.st_size - 64 * 1024))
+            lines = f.read().decode('utf-8', errors='replace').splitlines()
             print(f"\n📝 Last {min(10, len(lines))} log entries:")
             print("-" * 40)
             for line in lines[-10:]:
@@ -38,9 +48,8 @@ def demo_logging():
         print("❌ No log file found")
     
     # Demonstrate log file size
-    if os.path.exists(log_file):
-        size = os.path.getsize(log_file)
-        print(f"\n📊 Log file size: {size} bytes")
+    if st:
+        print(f"\n📊 Log file size: {st.st_size} bytes")
     
     # Close the app
     app.root.quit()
@@ -6,15 +6,207 @@ Dock App Updater - A utility to update non-OS native apps in macOS dock
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, filedialog
 import threading
+import sys
 import subprocess
+import shutil
 import time
 import os
+import re
+import signal
 import plistlib
+import mmap
 import keyring
-import psutil
 from pathlib import Path
 import logging
-from datetime import datetime
+import logging.handlers
+import queue
+import atexit
+import json
+import socket
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+
+# Records from the GUI and worker threads are enqueued here and written to
+# disk by a QueueListener thread, so logging never blocks the Tk main loop
+_LOG_QUEUE = queue.Queue(-1)
+
+# Rotate the log file so it stays small instead of growing without bound
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 2
+
+# Records buffered before the file is written, unless an ERROR arrives first
+LOG_BUFFER_CAPACITY = 100
+
+# Package manager executables probed on PATH
+PACKAGE_MANAGERS = ('brew', 'port', 'pip3', 'npm')
+
+# Most lines held in the activity log, and buffered between flushes
+# (oldest dropped)
+LOG_DISPLAY_BUFFER_MAX = 1000
+
+# Close this long after a successful update unless the user interacts
+AUTO_CLOSE_SECONDS = 10
+AUTO_CLOSE_POLL_MS = 500
+
+# Events that count as user interaction while auto-close is armed
+_INTERACTION_EVENTS = ('<Button-1>', '<Key>', '<FocusIn>')
+
+# Package managers that perform updates, with their display names
+MANAGER_LABELS = (('brew', 'Homebrew'), ('port', 'MacPorts'), ('npm', 'npm'))
+
+# Refresh the cached sudo ticket this often during long MacPorts runs
+SUDO_KEEPALIVE_SECONDS = 240
+
+# brew update, upgrade and upgrade --cask share one shell, with the brew
+# path passed in as $0; the exit code tells which step failed (cask
+# failures are non-critical)
+BREW_UPDATE_SCRIPT = '"$0" update || exit 10; "$0" upgrade || exit 11; "$0" upgrade --cask || exit 12'
+BREW_STEP_FAILURES = {10: "Homebrew update failed", 11: "Homebrew upgrade failed"}
+BREW_CASK_FAILURE = 12
+
+# Matches brew upgrade lines such as "firefox 120.0 -> 121.0" and
+# "==> Upgrading firefox 120.0 -> 121.0"
+_BREW_UPGRADE_RE = re.compile(r'^(?:==> Upgrading )?(\S+) (\S+) -> (\S+)$')
+
+# Pulls the version straight out of an XML Info.plist; values containing
+# entities, and files where the key occurs more than once, are left to plistlib
+_XML_VERSION_KEY = b'<key>CFBundleShortVersionString</key>'
+_XML_VERSION_RE = re.compile(re.escape(_XML_VERSION_KEY) + rb'\s*<string>([^<&]*)</string>')
+
+# How often worker-thread UI events are applied on the Tk thread; at most
+# UI_EVENTS_PER_TICK per pass, with a quicker pass while a backlog remains
+UI_POLL_INTERVAL_MS = 100
+UI_BACKLOG_POLL_MS = 16
+UI_EVENTS_PER_TICK = 200
+
+# Last refreshed app list, shown at startup until the first rescan finishes
+SNAPSHOT_PATH = Path('~/Library/Caches/DockAppUpdater/snapshot.json').expanduser()
+
+# Threads used to read Info.plist versions concurrently during a refresh
+VERSION_LOOKUP_WORKERS = 8
+
+# Resolved once at import so log calls never repeat these lookups
+_HOSTNAME = socket.gethostname()
+_PID = os.getpid()
+_LEVEL_MAP = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+}
+
+
+class _ContextFilter(logging.Filter):
+    """Stamp records with the cached hostname and PID"""
+    
+    def filter(self, record):
+        record.hostname = _HOSTNAME
+        record.pid = _PID
+        return True
+
+
+# Location of the version plist inside an app bundle (macOS paths only)
+_PLIST_SUFFIX = '/Contents/Info.plist'
+
+# Path prefixes and app names that identify native macOS apps
+_NATIVE_PATHS = ('/System/', '/Applications/Utilities/', '/usr/')
+_NATIVE_APPS = frozenset({
+    'Finder', 'Safari', 'Mail', 'Calendar', 'Contacts', 'Maps',
+    'Photos', 'Messages', 'FaceTime', 'Music', 'TV', 'Podcasts',
+    'News', 'Stocks', 'Home', 'Shortcuts', 'System Preferences',
+})
+
+
+@functools.lru_cache(maxsize=256)
+def _is_native_app(app_path):
+    """Check if app is native macOS app, cached per path"""
+    app_name = os.path.basename(app_path.rstrip('/'))  # Dock URLs end in '/'
+    if app_name.endswith('.app'):
+        app_name = app_name[:-4]
+    return app_path.startswith(_NATIVE_PATHS) or app_name in _NATIVE_APPS
+
+
+def _password_pipe(secret):
+    """Return the read end of a pipe preloaded with secret and a newline
+    
+    The child reads the password straight from the kernel pipe buffer,
+    so no str copy of it is built for each subprocess call.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, secret)
+        os.write(write_fd, b"\n")
+    finally:
+        os.close(write_fd)
+    return read_fd
+
+
+def _wipe(secret):
+    """Overwrite a bytearray secret in place"""
+    if secret:
+        secret[:] = bytes(len(secret))
+
+
+def _normalize_app_name(name):
+    """Reduce an app or cask name to lowercase alphanumerics for matching
+    
+    "Visual Studio Code" and "visual-studio-code" both become
+    "visualstudiocode".
+    """
+    return ''.join(ch for ch in name.lower() if ch.isalnum())
+
+
+def _load_plist(path):
+    """Parse a plist directly from a read-only memory map of the file"""
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped; let plistlib report them
+            return plistlib.load(f)
+        with mm:
+            return plistlib.load(mm)
+
+
+@functools.lru_cache(maxsize=256)
+def _get_version(info_plist_path, mtime_ns):
+    """Read CFBundleShortVersionString, cached until the plist's mtime changes"""
+    with open(info_plist_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return 'Unknown'  # Empty file
+        with mm:
+            # XML plists: scan for the one key instead of building the dict,
+            # but only when it occurs once; another occurrence may be in a
+            # nested dict, and only plistlib can tell which is top level
+            if mm[:6] != b'bplist':
+                match = _XML_VERSION_RE.search(mm)
+                if (match and mm.find(_XML_VERSION_KEY) == match.start()
+                        and mm.find(_XML_VERSION_KEY, match.end()) == -1):
+                    try:
+                        return match.group(1).decode('utf-8')
+                    except UnicodeDecodeError:
+                        pass  # Let plistlib decide
+            try:
+                info_data = plistlib.load(mm)
+            except Exception:
+                # Malformed plist (plistlib raises more than ValueError, e.g.
+                # AttributeError for a bad <date>); cached too, so it isn't
+                # re-parsed every refresh
+                return 'Unknown'
+    if not isinstance(info_data, dict):
+        return 'Unknown'  # Well-formed, but not a bundle's Info.plist
+    return info_data.get('CFBundleShortVersionString', 'Unknown')
+
+
+# Shared by every refresh, so the lookup threads are only created once
+_VERSION_POOL = ThreadPoolExecutor(max_workers=VERSION_LOOKUP_WORKERS,
+                                   thread_name_prefix='version-lookup')
 
 
 class DockAppUpdater:
@@ -24,81 +216,152 @@ class DockAppUpdater:
         self.root.geometry("700x500")
         
         # Auto-close timer variables
-        self.auto_close_timer = None
-        self.user_interacted = False
+        self._close_deadline = None  # time.monotonic() value, None when disarmed
+        self._auto_close_polling = False
         self.close_after_update = False
         
         # Logging variables
         self.enable_logging = tk.BooleanVar(value=True)
+        self._logging_enabled = True  # Mirrors enable_logging without a Tcl call
         self.log_file_path = os.path.expanduser("~/dock_updater.log")
+        self.log_listener = None
+        self._mem_handler = None
+        self._log_buf = collections.deque(maxlen=LOG_DISPLAY_BUFFER_MAX)
+        self._ts_cache = (None, "")  # (epoch second, formatted timestamp)
         self.setup_logging()
+        atexit.register(self.stop_logging)
         
         # Force-stop and timeout variables
-        self.update_process = None
-        self.update_thread = None
-        self.force_stop_requested = False
+        self.update_processes = set()
+        self._stop_event = threading.Event()  # Set by force stop, cleared per update
         self.update_timeout = 300  # 5 minutes timeout for updates
         self.timeout_timer = None
         
-        # Bind focus and click events to detect user interaction
-        self.root.bind('<Button-1>', self.on_user_interaction)
-        self.root.bind('<Key>', self.on_user_interaction)
-        self.root.bind('<FocusIn>', self.on_user_interaction)
+        # Normalized app name -> new version, parsed from brew upgrade output
+        self._version_deltas = {}
+        
+        # Sudo password as a bytearray so it can be wiped when replaced;
+        # read from the keychain once and reused until it is changed
+        self.sudo_password = None
+        self._cred_cache_valid = False
+        
+        # Package manager executables, resolved once instead of per update
+        self.refresh_tools()
+        
+        # Worker threads post ("status" | "log" | "call", ...) events here
+        self._ui_q = queue.Queue()
+        
+        # Refreshes and updates run in order on one long-lived worker thread
+        self._work_q = queue.Queue()
+        threading.Thread(target=self._worker_loop, daemon=True).start()
         
         self.setup_ui()
         self.load_sudo_credentials()
+        self.root.after(UI_POLL_INTERVAL_MS, self._drain_ui)
         
         # Log startup
         self.log_message("Dock App Updater started", "INFO")
         
     def setup_logging(self):
         """Setup logging configuration"""
+        # Stop the previous listener so pending records reach the old file
+        self.stop_logging()
+        
         # Create logger
         self.logger = logging.getLogger('DockAppUpdater')
         self.logger.setLevel(logging.INFO)
+        self._effective_level = self.logger.getEffectiveLevel()
         
         # Clear any existing handlers
         self.logger.handlers.clear()
         
-        # Create file handler
-        if self.enable_logging.get():
-            file_handler = logging.FileHandler(self.log_file_path)
+        # Create file handler, owned by the queue listener thread
+        if self._logging_enabled:
+            # delay=True defers opening the file until the first record is written
+            file_handler = logging.handlers.RotatingFileHandler(
+                self.log_file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                delay=True)
             file_handler.setLevel(logging.INFO)
             
             # Create formatter
-            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            formatter = logging.Formatter(
+                '%(asctime)s - %(hostname)s[%(pid)d] - %(levelname)s - %(message)s')
             file_handler.setFormatter(formatter)
+            file_handler.addFilter(_ContextFilter())
+            
+            # Batch records in memory; errors are written out immediately
+            self._mem_handler = logging.handlers.MemoryHandler(
+                LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=file_handler)
+            self._mem_handler.setLevel(logging.INFO)
+            
+            # The logger only enqueues records; the listener does the file I/O
+            self.log_listener = logging.handlers.QueueListener(
+                _LOG_QUEUE, self._mem_handler, respect_handler_level=True)
+            self.log_listener.start()
+            self.logger.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
             
-            # Add handler to logger
-            self.logger.addHandler(file_handler)
-            
-    def log_message(self, message, level="INFO"):
-        """Log a message both to file and GUI display"""
-        if self.enable_logging.get():
-            if level == "INFO":
-                self.logger.info(message)
-            elif level == "WARNING":
-                self.logger.warning(message)
-            elif level == "ERROR":
-                self.logger.error(message)
-            elif level == "DEBUG":
-                self.logger.debug(message)
+    def flush_logging(self):
+        """Block until all queued log records have been written to disk"""
+        if self.log_listener:
+            _LOG_QUEUE.join()
+            self._mem_handler.flush()
                 
-        # Also display in GUI log area if it exists
-        if hasattr(self, 'log_display'):
-            try:
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                log_entry = f"[{timestamp}] {level}: {message}\n"
-                self.log_display.insert(tk.END, log_entry)
-                self.log_display.see(tk.END)  # Auto-scroll to bottom
-            except tk.TclError:
-                # GUI is being destroyed, skip GUI logging
-                pass
+    def stop_logging(self):
+        """Stop the queue listener, flush buffered records and close the log file"""
+        if self.log_listener:
+            self.log_listener.stop()
+            file_handler = self._mem_handler.target
+            self._mem_handler.close()  # Flushes to file_handler first
+            file_handler.close()
+            self.log_listener = None
+            self._mem_handler = None
+            
+    def log_message(self, message, level="INFO", *args):
+        """Log a message both to file and GUI display
+        
+        Extra positional args are %-style arguments for message; they are
+        only formatted, once, if the level passes the filter.
+        """
+        levelno = _LEVEL_MAP[level]
+        if levelno < self._effective_level:
+            return
+        if args:
+            message = message % args
+            
+        if self._logging_enabled:
+            self.logger.log(levelno, message)
+                
+        # Also queue for the GUI log area; _flush_log_display draws it.
+        # Lines within the same second share one formatted timestamp
+        sec = int(time.time())
+        if sec != self._ts_cache[0]:
+            self._ts_cache = (sec, time.strftime("%H:%M:%S", time.localtime(sec)))
+        timestamp = self._ts_cache[1]
+        self._log_buf.append(f"[{timestamp}] {level}: {message}\n")
+            
+    def _flush_log_display(self):
+        """Write buffered log lines to the log display in a single insert"""
+        if not self._log_buf:
+            return
+        entries = []
+        while self._log_buf:
+            entries.append(self._log_buf.popleft())
+        text = "".join(entries)
+        self.log_display.insert(tk.END, text)
+        
+        # Keep only the newest lines so the widget stays cheap to redraw;
+        # lines are counted here rather than by querying the widget
+        self._log_lines += text.count("\n")
+        if self._log_lines > LOG_DISPLAY_BUFFER_MAX:
+            self.log_display.delete('1.0', f'{self._log_lines - LOG_DISPLAY_BUFFER_MAX + 1}.0')
+            self._log_lines = LOG_DISPLAY_BUFFER_MAX
+        self.log_display.see(tk.END)  # Auto-scroll to bottom
             
     def toggle_logging(self):
         """Toggle logging on/off"""
+        self._logging_enabled = self.enable_logging.get()
         self.setup_logging()
-        if self.enable_logging.get():
+        if self._logging_enabled:
             self.log_message("Logging enabled", "INFO")
         else:
             self.log_message("Logging disabled", "WARNING")
@@ -115,41 +378,51 @@ class DockAppUpdater:
         if filename:
             self.log_file_path = filename
             self.setup_logging()  # Reinitialize with new path
-            self.log_message(f"Log file path changed to: {filename}", "INFO")
+            self.log_message("Log file path changed to: %s", "INFO", filename)
             
     def view_log_file(self):
         """View the current log file in default text editor"""
+        self.flush_logging()  # Write out buffered records first
         if os.path.exists(self.log_file_path):
             try:
+                # Launch the viewer without waiting; notepad would otherwise
+                # block the GUI until it is closed
                 if os.name == 'posix':  # macOS/Linux
-                    subprocess.run(['open', self.log_file_path])
+                    subprocess.Popen(['open', self.log_file_path],
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
                 elif os.name == 'nt':  # Windows
-                    subprocess.run(['notepad', self.log_file_path])
-                self.log_message(f"Opened log file: {self.log_file_path}", "INFO")
+                    subprocess.Popen(['notepad', self.log_file_path])
+                self.log_message("Opened log file: %s", "INFO", self.log_file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not open log file: {str(e)}")
-                self.log_message(f"Failed to open log file: {str(e)}", "ERROR")
+                self.log_message("Failed to open log file: %s", "ERROR", e)
         else:
             messagebox.showwarning("Warning", "Log file does not exist yet.")
             
     def clear_log(self):
         """Clear the log display and optionally the log file"""
-        # Clear GUI display
+        # Clear GUI display, including lines not drawn yet
+        self._log_buf.clear()
         self.log_display.delete(1.0, tk.END)
+        self._log_lines = 0
         
         # Ask if user wants to clear the log file too
         if messagebox.askyesno("Clear Log File", "Do you also want to clear the log file on disk?"):
             try:
-                with open(self.log_file_path, 'w') as f:
-                    f.write('')
+                # Write out buffered records first so they don't reappear after truncation
+                self.flush_logging()
+                try:
+                    os.truncate(self.log_file_path, 0)
+                except FileNotFoundError:
+                    pass  # Nothing has been logged to this file yet
                 self.log_message("Log file cleared", "INFO")
             except Exception as e:
                 messagebox.showerror("Error", f"Could not clear log file: {str(e)}")
-                self.log_message(f"Failed to clear log file: {str(e)}", "ERROR")
+                self.log_message("Failed to clear log file: %s", "ERROR", e)
                 
     def force_stop_update(self):
         """Force stop the current update process"""
-        self.force_stop_requested = True
+        self._stop_event.set()
         self.log_message("Force stop requested by user", "WARNING")
         
         # Cancel timeout timer if active
@@ -157,13 +430,19 @@ class DockAppUpdater:
             self.root.after_cancel(self.timeout_timer)
             self.timeout_timer = None
             
-        # Terminate update process if running
-        if self.update_process and self.update_process.poll() is None:
+        # Terminate update processes that are still running
+        for process in list(self.update_processes):
+            if process.poll() is not None:
+                continue
             try:
-                self.update_process.terminate()
+                try:
+                    # Also stops children of a shell started by _run_streaming
+                    os.killpg(process.pid, signal.SIGTERM)
+                except OSError:
+                    process.terminate()
                 self.log_message("Update process terminated", "INFO")
             except Exception as e:
-                self.log_message(f"Failed to terminate process: {str(e)}", "ERROR")
+                self.log_message("Failed to terminate process: %s", "ERROR", e)
                 
         # Reset UI state
         try:
@@ -184,7 +463,7 @@ class DockAppUpdater:
             self.root.after_cancel(self.timeout_timer)
             
         self.timeout_timer = self.root.after(self.update_timeout * 1000, self.handle_update_timeout)
-        self.log_message(f"Update timeout set for {self.update_timeout} seconds", "INFO")
+        self.log_message("Update timeout set for %d seconds", "INFO", self.update_timeout)
         
     def handle_update_timeout(self):
         """Handle update timeout"""
@@ -195,24 +474,24 @@ class DockAppUpdater:
     def on_treeview_click(self, event):
         """Handle treeview click to toggle app selection"""
         try:
-            region = self.app_tree.identify("region", event.x, event.y)
-            if region == "cell":
-                item = self.app_tree.identify_row(event.y)
-                column = self.app_tree.identify_column(event.x)
-                
-                # Only process clicks on the checkbox column
-                if column == "#1" and item:  # #1 is the first column (selected)
-                    current_values = list(self.app_tree.item(item, "values"))
-                    if current_values and len(current_values) >= 2:
-                        # Toggle selection
-                        current_values[0] = "☐" if current_values[0] == "☑" else "☑"
-                        self.app_tree.item(item, values=current_values)
-                        
-                        app_name = current_values[1] if len(current_values) > 1 else "Unknown"
-                        selected = current_values[0] == "☑"
-                        self.log_message(f"App {app_name} {'selected' if selected else 'deselected'} for update", "INFO")
+            # Only process clicks on the checkbox column; most clicks are
+            # rejected here after a single Tcl call
+            if self.app_tree.identify_column(event.x) != "#1":  # #1 is the first column (selected)
+                return
+            # Heading and empty-area clicks have no row
+            item = self.app_tree.identify_row(event.y)
+            if item:
+                current_values = list(self.app_tree.item(item, "values"))
+                if current_values and len(current_values) >= 2:
+                    # Toggle selection
+                    current_values[0] = "☐" if current_values[0] == "☑" else "☑"
+                    self.app_tree.item(item, values=current_values)
+                    
+                    app_name = current_values[1] if len(current_values) > 1 else "Unknown"
+                    selected = current_values[0] == "☑"
+                    self.log_message("App %s %s for update", "INFO", app_name, 'selected' if selected else 'deselected')
         except Exception as e:
-            self.log_message(f"Error in treeview click handler: {str(e)}", "ERROR")
+            self.log_message("Error in treeview click handler: %s", "ERROR", e)
         
     def setup_ui(self):
         """Setup the main UI components"""
@@ -314,6 +593,7 @@ class DockAppUpdater:
         
         # Log text area with scrollbar
         self.log_display = tk.Text(log_frame, height=8, wrap=tk.WORD)
+        self._log_lines = 0  # Newline-terminated lines currently in log_display
         log_scrollbar = ttk.Scrollbar(log_frame, orient="vertical", command=self.log_display.yview)
         self.log_display.configure(yscrollcommand=log_scrollbar.set)
         
@@ -341,32 +621,82 @@ class DockAppUpdater:
         self.root.rowconfigure(0, weight=1)
         self.root.columnconfigure(0, weight=1)
         
+    def _drain_ui(self):
+        """Apply all pending worker-thread UI events and log lines in a single pass"""
+        status = None
+        delay = UI_POLL_INTERVAL_MS
+        try:
+            for _ in range(UI_EVENTS_PER_TICK):
+                event = self._ui_q.get_nowait()
+                kind = event[0]
+                if kind == "status":
+                    # Only the most recent status is worth drawing
+                    status = event[1]
+                elif kind == "log":
+                    self.log_message(*event[1:])
+                elif kind == "call":
+                    # Show the pending status before the callback replaces it
+                    if status is not None:
+                        self.status_label.config(text=status)
+                        status = None
+                    event[1](*event[2:])
+            else:
+                # Leave the rest for a later pass so the window can repaint
+                delay = UI_BACKLOG_POLL_MS
+        except queue.Empty:
+            pass
+        finally:
+            # Keep polling even if a callback raised
+            try:
+                if status is not None:
+                    self.status_label.config(text=status)
+                self._flush_log_display()
+                self.root.after(delay, self._drain_ui)
+            except tk.TclError:
+                # GUI is being destroyed, stop polling
+                pass
+        
     def on_user_interaction(self, event=None):
         """Handle user interaction to prevent auto-close"""
-        self.user_interacted = True
-        if self.auto_close_timer:
-            self.root.after_cancel(self.auto_close_timer)
-            self.auto_close_timer = None
+        # Just disarm; the poller notices on its next tick
+        self._close_deadline = None
             
     def start_auto_close_timer(self):
-        """Start 10-second auto-close timer"""
+        """Start the AUTO_CLOSE_SECONDS auto-close timer"""
         if not self.close_after_update:
             return
             
-        self.user_interacted = False
-        self.auto_close_timer = self.root.after(10000, self.auto_close)
-        self.status_label.config(text="Updates complete. App will close in 10 seconds unless you interact with it.")
-        
-    def auto_close(self):
-        """Close the app if user hasn't interacted"""
-        if not self.user_interacted:
+        self._close_deadline = time.monotonic() + AUTO_CLOSE_SECONDS
+        if not self._auto_close_polling:
+            self._auto_close_polling = True
+            # Interaction is only watched while armed, so focus and click
+            # events don't call into Python during normal use
+            for sequence in _INTERACTION_EVENTS:
+                self.root.bind(sequence, self.on_user_interaction)
+            self.root.after(AUTO_CLOSE_POLL_MS, self._check_auto_close)
+        self.status_label.config(
+            text=f"Updates complete. App will close in {AUTO_CLOSE_SECONDS} seconds unless you interact with it.")
+        
+    def _check_auto_close(self):
+        """Close the app once the deadline passes without user interaction"""
+        if self._close_deadline is None:
+            self._stop_auto_close_polling()
+        elif time.monotonic() >= self._close_deadline:
+            self._stop_auto_close_polling()
             self.root.quit()
+        else:
+            self.root.after(AUTO_CLOSE_POLL_MS, self._check_auto_close)
+            
+    def _stop_auto_close_polling(self):
+        """Stop watching for user interaction"""
+        self._auto_close_polling = False
+        for sequence in _INTERACTION_EVENTS:
+            self.root.unbind(sequence)
             
     def load_sudo_credentials(self):
         """Load sudo credentials from keychain"""
         try:
-            password = keyring.get_password("dock_updater", "sudo_password")
-            self.sudo_password = password
+            password = self._get_sudo_password()
             if password:
                 self.status_label.config(text="Sudo credentials loaded from keychain")
                 self.log_message("Sudo credentials loaded from keychain", "INFO")
@@ -374,25 +704,33 @@ class DockAppUpdater:
                 self.status_label.config(text="No sudo credentials found. Click 'Set Credentials' to add them.")
                 self.log_message("No sudo credentials found in keychain", "WARNING")
         except Exception as e:
-            self.sudo_password = None
+            self._replace_sudo_password(None)
             self.status_label.config(text="Error loading credentials")
-            self.log_message(f"Error loading credentials: {str(e)}", "ERROR")
+            self.log_message("Error loading credentials: %s", "ERROR", e)
             
     def set_sudo_credentials(self):
         """Set sudo credentials and store in keychain"""
         password = simpledialog.askstring("Sudo Password", "Enter your sudo password:", show='*')
         if password:
+            secret = bytearray(password.encode())
             try:
                 # Test the password
-                result = subprocess.run(['sudo', '-S', 'echo', 'test'], 
-                                      input=f"{password}\n", 
-                                      text=True, 
-                                      capture_output=True, 
-                                      timeout=10)
+                stdin_fd = _password_pipe(secret)
+                try:
+                    # Only the exit status matters, so no output pipes
+                    result = subprocess.run(['sudo', '-S', 'true'], 
+                                          stdin=stdin_fd, 
+                                          stdout=subprocess.DEVNULL,
+                                          stderr=subprocess.DEVNULL,
+                                          timeout=10)
+                finally:
+                    os.close(stdin_fd)
                 
                 if result.returncode == 0:
                     keyring.set_password("dock_updater", "sudo_password", password)
-                    self.sudo_password = password
+                    self._replace_sudo_password(secret)
+                    self._cred_cache_valid = True
+                    secret = None
                     self.status_label.config(text="Sudo credentials saved successfully")
                     messagebox.showinfo("Success", "Sudo credentials saved to keychain")
                     self.log_message("Sudo credentials saved successfully to keychain", "INFO")
@@ -401,106 +739,158 @@ class DockAppUpdater:
                     self.log_message("Invalid sudo password provided", "ERROR")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save credentials: {str(e)}")
-                self.log_message(f"Failed to save credentials: {str(e)}", "ERROR")
+                self.log_message("Failed to save credentials: %s", "ERROR", e)
+            finally:
+                # Wipe the candidate unless it became the stored password
+                _wipe(secret)
                 
+    def _get_sudo_password(self):
+        """Return the sudo password, only querying the keychain on a cache miss"""
+        if not self._cred_cache_valid:
+            password = keyring.get_password("dock_updater", "sudo_password")
+            self._replace_sudo_password(bytearray(password.encode()) if password else None)
+            self._cred_cache_valid = True
+        return self.sudo_password
+        
+    def _replace_sudo_password(self, secret):
+        """Store a new sudo password bytearray, wiping the previous one"""
+        _wipe(self.sudo_password)
+        self.sudo_password = secret
+        
     def get_dock_apps(self):
-        """Get list of apps from dock"""
+        """Get list of apps from dock, or None if the dock could not be read"""
         try:
             dock_plist_path = os.path.expanduser("~/Library/Preferences/com.apple.dock.plist")
-            if not os.path.exists(dock_plist_path):
+            try:
+                dock_data = _load_plist(dock_plist_path)
+            except FileNotFoundError:
                 self.log_message("Dock plist file not found", "WARNING")
-                return []
-                
-            with open(dock_plist_path, 'rb') as f:
-                dock_data = plistlib.load(f)
+                return None
                 
             apps = []
+            total = 0
             for item in dock_data.get('persistent-apps', []):
                 try:
-                    if 'tile-data' in item and 'file-label' in item['tile-data']:
-                        app_name = item['tile-data']['file-label']
-                        if 'file-data' in item['tile-data'] and '_CFURLString' in item['tile-data']['file-data']:
-                            app_path = item['tile-data']['file-data']['_CFURLString'].replace('file://', '')
-                            # Decode URL-encoded path
-                            try:
-                                from urllib.parse import unquote
-                                app_path = unquote(app_path)
-                            except:
-                                pass  # Use original path if decode fails
-                                
-                            apps.append({
-                                'name': app_name,
-                                'path': app_path,
-                                'version': self.get_app_version(app_path),
-                                'is_native': self.is_native_app(app_path)
-                            })
+                    tile = item.get('tile-data') or {}
+                    app_name = tile.get('file-label')
+                    url = (tile.get('file-data') or {}).get('_CFURLString')
+                    if app_name and url:
+                        # Drop the scheme and host and decode URL-encoded characters;
+                        # interned so every refresh shares one key in the path caches
+                        app_path = sys.intern(url2pathname(urlparse(url).path))
+                        total += 1
+                        
+                        # Skip native macOS apps before reading their Info.plist
+                        if self.is_native_app(app_path):
+                            continue
+                        apps.append({
+                            'name': app_name,
+                            'path': app_path
+                        })
                 except Exception as e:
-                    self.log_message(f"Error processing dock item: {str(e)}", "WARNING")
+                    self.log_message("Error processing dock item: %s", "WARNING", e)
                     continue
+                    
+            versions = self.get_app_versions([app['path'] for app in apps])
+            for app in apps:
+                app['version'] = versions[app['path']]
             
-            # Filter out native macOS apps
-            non_native_apps = [app for app in apps if not app['is_native']]
-            self.log_message(f"Found {len(apps)} total apps, {len(non_native_apps)} non-native", "DEBUG")
-            return non_native_apps
+            self.log_message("Found %d total apps, %d non-native", "DEBUG", total, len(apps))
+            return apps
             
         except Exception as e:
             error_msg = f"Failed to read dock apps: {str(e)}"
             self.log_message(error_msg, "ERROR")
-            try:
-                messagebox.showerror("Error", error_msg)
-            except tk.TclError:
-                # GUI may not be available
-                pass
-            return []
+            # Runs on the worker thread, so the dialog is shown from the Tk thread
+            self._ui_q.put(("call", messagebox.showerror, "Error", error_msg))
+            return None
             
     def is_native_app(self, app_path):
         """Check if app is native macOS app (simplified check)"""
-        native_paths = ['/System/', '/Applications/Utilities/', '/usr/']
-        native_apps = ['Finder', 'Safari', 'Mail', 'Calendar', 'Contacts', 'Maps', 
-                      'Photos', 'Messages', 'FaceTime', 'Music', 'TV', 'Podcasts',
-                      'News', 'Stocks', 'Home', 'Shortcuts', 'System Preferences']
-        
-        app_name = os.path.basename(app_path).replace('.app', '')
-        
-        return (any(app_path.startswith(path) for path in native_paths) or 
-                app_name in native_apps)
+        return _is_native_app(app_path)
                 
     def get_app_version(self, app_path):
         """Get app version from Info.plist"""
         try:
-            info_plist_path = os.path.join(app_path, 'Contents', 'Info.plist')
-            if os.path.exists(info_plist_path):
-                with open(info_plist_path, 'rb') as f:
-                    info_data = plistlib.load(f)
-                    return info_data.get('CFBundleShortVersionString', 'Unknown')
-            return 'Unknown'
-        except:
+            info_plist_path = app_path.rstrip('/') + _PLIST_SUFFIX  # Dock URLs end in '/'
+            # One stat both checks existence and provides the cache key
+            st = os.stat(info_plist_path)
+            return _get_version(info_plist_path, st.st_mtime_ns)
+        except OSError:
             return 'Unknown'
             
+    def _worker_loop(self):
+        """Run queued background jobs one at a time"""
+        while True:
+            job = self._work_q.get()
+            try:
+                job()
+            except Exception as e:
+                self._ui_q.put(("log", "Background job failed: %s" % e, "ERROR"))
+                
+    def get_app_versions(self, app_paths):
+        """Get versions for many apps at once, as a {path: version} dict"""
+        # Info.plist reads are independent I/O, so overlap them
+        return dict(zip(app_paths, _VERSION_POOL.map(self.get_app_version, app_paths)))
+            
+    def refresh_tools(self):
+        """Locate supported package managers on PATH
+        
+        Commands run the cached absolute paths, so exec skips the PATH search.
+        """
+        self._tools = {name: shutil.which(name) for name in PACKAGE_MANAGERS}
+        
     def refresh_apps(self):
         """Refresh the app list"""
+        self.refresh_tools()
         self.status_label.config(text="Refreshing app list...")
         self.progress.start()
         self.log_message("Starting app list refresh", "INFO")
         
         def refresh_thread():
             apps = self.get_dock_apps()
-            self.root.after(0, lambda: self.update_app_list(apps))
+            self._ui_q.put(("call", self.update_app_list, apps or []))
+            # Keep the last good snapshot if the dock could not be read
+            if apps is not None:
+                self.save_snapshot(apps)
+            
+        self._work_q.put(refresh_thread)
+        
+    def save_snapshot(self, apps):
+        """Write the app list to SNAPSHOT_PATH for the next startup"""
+        try:
+            SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = SNAPSHOT_PATH.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(apps))
+            os.replace(tmp_path, SNAPSHOT_PATH)  # Readers never see a partial file
+        except OSError as e:
+            self._ui_q.put(("log", "Could not save app list snapshot: %s" % e, "WARNING"))
             
-        threading.Thread(target=refresh_thread, daemon=True).start()
+    def load_snapshot(self):
+        """Show the app list saved by the last refresh, if there is one"""
+        try:
+            rows = [(app['name'], app['version']) for app in json.loads(SNAPSHOT_PATH.read_text())]
+        except (OSError, ValueError, KeyError, TypeError):
+            return  # Missing or unreadable; the rescan fills the list instead
+        for name, version in rows:
+            self.app_tree.insert("", "end", values=("☑", name, version, "Ready for update"))
+        self.log_message("Loaded %d apps from the last refresh", "DEBUG", len(rows))
         
     def update_app_list(self, apps):
         """Update the app list in the UI"""
-        # Clear existing items
-        for item in self.app_tree.get_children():
-            self.app_tree.delete(item)
+        # Clear existing items in a single Tcl call
+        children = self.app_tree.get_children()
+        if children:
+            self.app_tree.delete(*children)
             
         # Add new items - all pre-selected by default
+        debug = self._effective_level <= logging.DEBUG
         for app in apps:
             status = "Ready for update"
             # Pre-select all apps with checked checkbox
             self.app_tree.insert("", "end", values=("☑", app['name'], app['version'], status))
-            self.log_message(f"Found app: {app['name']} (v{app['version']}) - pre-selected for update", "DEBUG")
+            if debug:
+                self.log_message("Found app: %s (v%s) - pre-selected for update", "DEBUG", app['name'], app['version'])
             
         self.progress.stop()
         selected_count = len(apps)  # All apps are pre-selected
@@ -509,7 +899,7 @@ class DockAppUpdater:
         except tk.TclError:
             # GUI may be shutting down, ignore
             pass
-        self.log_message(f"App list refresh complete: {len(apps)} non-native apps found, all pre-selected", "INFO")
+        self.log_message("App list refresh complete: %d non-native apps found, all pre-selected", "INFO", len(apps))
         
     def update_selected_apps(self):
         """Update selected apps (those with checked checkboxes)"""
@@ -533,12 +923,12 @@ class DockAppUpdater:
         
         # Get all apps and select them
         for item in self.app_tree.get_children():
-            values = list(self.app_tree.item(item, "values"))
+            values = self.app_tree.item(item, "values")
             if values and len(values) >= 2:
                 app_names.append(values[1])  # App name is in column 1
-                # Ensure app is selected
-                values[0] = "☑"
-                self.app_tree.item(item, values=values)
+                # Ensure app is selected; rows start checked, so this is rare
+                if values[0] != "☑":
+                    self.app_tree.set(item, "selected", "☑")
                 
         if not app_names:
             messagebox.showinfo("Info", "No apps to update")
@@ -548,13 +938,21 @@ class DockAppUpdater:
         
     def perform_updates(self, app_names):
         """Perform updates for specified apps"""
-        if not self.sudo_password:
+        try:
+            password = self._get_sudo_password()
+        except Exception as e:
+            self._replace_sudo_password(None)
+            self.log_message("Error loading credentials: %s", "ERROR", e)
+            messagebox.showerror("Error", f"Error loading credentials: {str(e)}")
+            return
+        if not password:
             messagebox.showerror("Error", "Please set sudo credentials first")
             self.log_message("Update aborted: No sudo credentials available", "ERROR")
             return
             
-        # Reset force stop flag
-        self.force_stop_requested = False
+        # Reset force stop and versions reported by this run
+        self._stop_event.clear()
+        self._version_deltas = {}
         
         # Update UI state
         self.status_label.config(text="Updating apps...")
@@ -570,126 +968,200 @@ class DockAppUpdater:
         # Start timeout timer
         self.start_update_timeout()
         
-        self.log_message(f"Starting update process for {len(app_names)} apps: {', '.join(app_names)}", "INFO")
+        self.log_message("Starting update process for %d apps: %s", "INFO", len(app_names), ', '.join(app_names))
         
         def update_thread():
             try:
-                updated_something = False
-                
                 # Check for force stop before each operation
-                if self.force_stop_requested:
-                    self.root.after(0, lambda: self.update_failed("Update stopped by user"))
+                if self._stop_event.is_set():
+                    self._ui_q.put(("call", self.update_failed, "Update stopped by user"))
                     return
                 
-                # Check if Homebrew is available
-                result = subprocess.run(['which', 'brew'], capture_output=True, text=True)
-                if result.returncode == 0 and not self.force_stop_requested:
-                    self.root.after(0, lambda: self.status_label.config(text="Updating Homebrew packages..."))
-                    self.root.after(0, lambda: self.log_message("Homebrew detected, starting Homebrew updates", "INFO"))
-                    
-                    # First update Homebrew itself
-                    if not self.force_stop_requested:
-                        self.update_process = subprocess.Popen(['brew', 'update'])
-                        self.update_process.wait()
-                        if self.update_process.returncode != 0 and not self.force_stop_requested:
-                            raise Exception("Homebrew update failed")
-                        self.root.after(0, lambda: self.log_message("Homebrew updated successfully", "INFO"))
-                    
-                    # Then upgrade packages
-                    if not self.force_stop_requested:
-                        self.update_process = subprocess.Popen(['brew', 'upgrade'])
-                        self.update_process.wait()
-                        if self.update_process.returncode != 0 and not self.force_stop_requested:
-                            raise Exception("Homebrew upgrade failed")
-                        self.root.after(0, lambda: self.log_message("Homebrew packages upgraded", "INFO"))
-                    
-                    # Also check for casks
-                    if not self.force_stop_requested:
-                        self.update_process = subprocess.Popen(['brew', 'upgrade', '--cask'])
-                        self.update_process.wait()
-                        if self.update_process.returncode != 0 and not self.force_stop_requested:
-                            # Cask upgrade failures are non-critical
-                            self.root.after(0, lambda: self.log_message("Some cask upgrades failed (non-critical)", "WARNING"))
-                        else:
-                            self.root.after(0, lambda: self.log_message("Homebrew casks upgraded", "INFO"))
-                    
-                    updated_something = True
-                    
-                # Check if MacPorts is available
-                if not self.force_stop_requested:
-                    result = subprocess.run(['which', 'port'], capture_output=True, text=True)
-                    if result.returncode == 0 and not self.force_stop_requested:
-                        self.root.after(0, lambda: self.status_label.config(text="Updating MacPorts packages..."))
-                        self.root.after(0, lambda: self.log_message("MacPorts detected, starting MacPorts updates", "INFO"))
-                        
-                        # Update MacPorts
-                        if not self.force_stop_requested:
-                            self.update_process = subprocess.Popen(['sudo', '-S', 'port', 'selfupdate'], 
-                                                                 stdin=subprocess.PIPE, text=True)
-                            self.update_process.communicate(input=f"{self.sudo_password}\n")
-                            if self.update_process.returncode != 0 and not self.force_stop_requested:
-                                raise Exception("MacPorts selfupdate failed")
-                            self.root.after(0, lambda: self.log_message("MacPorts selfupdate completed", "INFO"))
-                        
-                        if not self.force_stop_requested:
-                            self.update_process = subprocess.Popen(['sudo', '-S', 'port', 'upgrade', 'outdated'], 
-                                                                 stdin=subprocess.PIPE, text=True)
-                            self.update_process.communicate(input=f"{self.sudo_password}\n")
-                            if self.update_process.returncode != 0 and not self.force_stop_requested:
-                                # MacPorts upgrade failures can be non-critical if no packages to upgrade
-                                self.root.after(0, lambda: self.log_message("MacPorts upgrade completed (check log for details)", "INFO"))
-                            else:
-                                self.root.after(0, lambda: self.log_message("MacPorts packages upgraded", "INFO"))
-                        
-                        updated_something = True
-                    
-                # Check if pip is available for Python packages
-                if not self.force_stop_requested:
-                    result = subprocess.run(['which', 'pip3'], capture_output=True, text=True)
-                    if result.returncode == 0 and not self.force_stop_requested:
-                        self.root.after(0, lambda: self.status_label.config(text="Checking pip packages..."))
-                        self.root.after(0, lambda: self.log_message("pip detected, checking for outdated packages", "INFO"))
-                        try:
-                            self.update_process = subprocess.Popen(['pip3', 'list', '--outdated'])
-                            self.update_process.wait()
-                            self.root.after(0, lambda: self.log_message("pip outdated packages listed (manual update recommended)", "WARNING"))
-                        except Exception:
-                            self.root.after(0, lambda: self.log_message("pip check completed with warnings", "WARNING"))
-                        # Note: We don't auto-upgrade pip packages as it can break system
+                managers = [label for tool, label in MANAGER_LABELS if self._tools[tool]]
+                if managers:
+                    self._ui_q.put(("status", "Updating %s packages..." % ", ".join(managers)))
                     
-                # Check if npm is available
-                if not self.force_stop_requested:
-                    result = subprocess.run(['which', 'npm'], capture_output=True, text=True)
-                    if result.returncode == 0 and not self.force_stop_requested:
-                        self.root.after(0, lambda: self.status_label.config(text="Updating npm packages..."))
-                        self.root.after(0, lambda: self.log_message("npm detected, starting global package updates", "INFO"))
-                        self.update_process = subprocess.Popen(['npm', 'update', '-g'])
-                        self.update_process.wait()
-                        if self.update_process.returncode != 0 and not self.force_stop_requested:
-                            self.root.after(0, lambda: self.log_message("npm update completed with warnings", "WARNING"))
-                        else:
-                            self.root.after(0, lambda: self.log_message("npm global packages updated", "INFO"))
-                        updated_something = True
+                # pip is only checked, never upgraded, so nothing waits on it
+                threading.Thread(target=self._check_pip, daemon=True).start()
+                
+                # Package managers are independent, so update them concurrently
+                pipelines = (self._update_brew, self._update_macports, self._update_npm)
+                with ThreadPoolExecutor(max_workers=len(pipelines)) as executor:
+                    futures = [executor.submit(pipeline) for pipeline in pipelines]
                     
+                    # result() re-raises the first pipeline failure
+                    updated_something = any([future.result() for future in futures])
+                
                 # Check final status
-                if self.force_stop_requested:
-                    self.root.after(0, lambda: self.update_failed("Update stopped by user"))
+                if self._stop_event.is_set():
+                    self._ui_q.put(("call", self.update_failed, "Update stopped by user"))
                 elif not updated_something:
-                    self.root.after(0, lambda: self.update_failed("No supported package managers found"))
-                    self.root.after(0, lambda: self.log_message("No supported package managers found", "ERROR"))
+                    self._ui_q.put(("call", self.update_failed, "No supported package managers found"))
+                    self._ui_q.put(("log", "No supported package managers found", "ERROR"))
                 else:
-                    self.root.after(0, self.update_complete)
+                    self._ui_q.put(("call", self.update_complete))
                 
             except Exception as e:
-                if not self.force_stop_requested:
+                if not self._stop_event.is_set():
                     error_msg = str(e)
-                    self.root.after(0, lambda: self.update_failed(error_msg))
+                    self._ui_q.put(("call", self.update_failed, error_msg))
                 else:
-                    self.root.after(0, lambda: self.update_failed("Update stopped by user"))
+                    self._ui_q.put(("call", self.update_failed, "Update stopped by user"))
                     
-        # Store thread reference for potential cleanup
-        self.update_thread = threading.Thread(target=update_thread, daemon=True)
-        self.update_thread.start()
+        self._work_q.put(update_thread)
+        
+    def _update_brew(self):
+        """Update Homebrew and its packages; return False if brew is unavailable"""
+        if not self._tools['brew'] or self._stop_event.is_set():
+            return False
+        self._ui_q.put(("log", "Homebrew detected, starting Homebrew updates", "INFO"))
+        
+        # Update Homebrew, formulae and casks in a single shell
+        returncode = self._run_streaming(['/bin/sh', '-c', BREW_UPDATE_SCRIPT, self._tools['brew']],
+                                         line_handler=self._record_version_delta)
+        if self._stop_event.is_set():
+            # The shell was killed part way; no step can be reported as done
+            return True
+        if returncode not in (0, BREW_CASK_FAILURE):
+            raise Exception(BREW_STEP_FAILURES.get(
+                returncode, "Homebrew update exited with code %d" % returncode))
+        self._ui_q.put(("log", "Homebrew updated successfully", "INFO"))
+        self._ui_q.put(("log", "Homebrew packages upgraded", "INFO"))
+        if returncode == BREW_CASK_FAILURE:
+            # Cask upgrade failures are non-critical
+            self._ui_q.put(("log", "Some cask upgrades failed (non-critical)", "WARNING"))
+        else:
+            self._ui_q.put(("log", "Homebrew casks upgraded", "INFO"))
+        return True
+        
+    def _update_macports(self):
+        """Update MacPorts and its ports; return False if port is unavailable"""
+        if not self._tools['port'] or self._stop_event.is_set():
+            return False
+        self._ui_q.put(("log", "MacPorts detected, starting MacPorts updates", "INFO"))
+        
+        # Authenticate once; the port commands below reuse the sudo ticket
+        self._prime_sudo()
+        keepalive = self._start_sudo_keepalive()
+        try:
+            # Update MacPorts
+            returncode = self._run_streaming(['sudo', '-n', self._tools['port'], 'selfupdate'])
+            if returncode != 0 and not self._stop_event.is_set():
+                raise Exception("MacPorts selfupdate failed")
+            self._ui_q.put(("log", "MacPorts selfupdate completed", "INFO"))
+            
+            if not self._stop_event.is_set():
+                returncode = self._run_streaming(['sudo', '-n', self._tools['port'], 'upgrade', 'outdated'])
+                if returncode != 0 and not self._stop_event.is_set():
+                    # MacPorts upgrade failures can be non-critical if no packages to upgrade
+                    self._ui_q.put(("log", "MacPorts upgrade completed (check log for details)", "INFO"))
+                else:
+                    self._ui_q.put(("log", "MacPorts packages upgraded", "INFO"))
+        finally:
+            keepalive.set()
+        return True
+        
+    def _prime_sudo(self):
+        """Cache a sudo ticket so later sudo -n calls need no password
+        
+        sudo keys its ticket on the tty or session, so this runs in a new
+        session without a tty, like the port commands in _run_streaming.
+        """
+        password = self._get_sudo_password()
+        if not password:
+            raise Exception("No sudo credentials set")
+        stdin_fd = _password_pipe(password)
+        try:
+            result = subprocess.run(['sudo', '-S', '-v'], stdin=stdin_fd,
+                                    stdout=subprocess.DEVNULL,
+                                    stderr=subprocess.DEVNULL, timeout=10,
+                                    start_new_session=True)
+        finally:
+            os.close(stdin_fd)
+        if result.returncode != 0:
+            raise Exception("Sudo authentication failed")
+            
+    def _start_sudo_keepalive(self):
+        """Refresh the sudo ticket in the background; set the returned event to stop"""
+        stop = threading.Event()
+        
+        def keepalive():
+            while not stop.wait(SUDO_KEEPALIVE_SECONDS):
+                self._refresh_sudo_ticket()
+                
+        threading.Thread(target=keepalive, daemon=True).start()
+        return stop
+        
+    def _refresh_sudo_ticket(self):
+        """Extend the sudo ticket primed by _prime_sudo, from the same kind of session"""
+        subprocess.run(['sudo', '-n', '-v'], stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       start_new_session=True)
+        
+    def _update_npm(self):
+        """Update global npm packages; return False if npm is unavailable"""
+        if not self._tools['npm'] or self._stop_event.is_set():
+            return False
+        self._ui_q.put(("log", "npm detected, starting global package updates", "INFO"))
+        returncode = self._run_streaming([self._tools['npm'], 'update', '-g'])
+        if returncode != 0 and not self._stop_event.is_set():
+            self._ui_q.put(("log", "npm update completed with warnings", "WARNING"))
+        else:
+            self._ui_q.put(("log", "npm global packages updated", "INFO"))
+        return True
+        
+    def _check_pip(self):
+        """List outdated pip packages without upgrading them"""
+        if not self._tools['pip3'] or self._stop_event.is_set():
+            return
+        self._ui_q.put(("log", "pip detected, checking for outdated packages", "INFO"))
+        try:
+            self._run_streaming([self._tools['pip3'], 'list', '--outdated'])
+            self._ui_q.put(("log", "pip outdated packages listed (manual update recommended)", "WARNING"))
+        except Exception:
+            self._ui_q.put(("log", "pip check completed with warnings", "WARNING"))
+        # Note: We don't auto-upgrade pip packages as it can break system
+        
+    def _run_streaming(self, cmd, line_handler=None):
+        """Run cmd as an update process, streaming its output to the log
+        
+        Lines are forwarded as they arrive instead of being buffered until
+        exit. line_handler, if given, is also called with each output line.
+        """
+        # A new session lets force stop signal the whole process group
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True,
+                                   bufsize=1, start_new_session=True)
+        # Tracked so force stop can terminate every running pipeline
+        self.update_processes.add(process)
+        try:
+            for line in process.stdout:
+                line = line.rstrip()
+                if line:
+                    self._ui_q.put(("log", line, "INFO"))
+                    if line_handler:
+                        line_handler(line)
+            return process.wait()
+        finally:
+            self.update_processes.discard(process)
+        
+    def _record_version_delta(self, line):
+        """Remember the new version from a brew upgrade output line"""
+        match = _BREW_UPGRADE_RE.match(line)
+        if match:
+            name, _old_version, new_version = match.groups()
+            self._version_deltas[_normalize_app_name(name)] = new_version
+            
+    def apply_version_deltas(self):
+        """Show upgraded versions in the app list without rescanning the dock"""
+        updated = 0
+        for item in self.app_tree.get_children():
+            name = self.app_tree.set(item, "name")
+            new_version = self._version_deltas.get(_normalize_app_name(name))
+            if new_version:
+                self.app_tree.set(item, "version", new_version)
+                updated += 1
+        self.log_message("Updated versions for %d apps from upgrade output", "INFO", updated)
         
     def update_complete(self):
         """Handle update completion"""
@@ -711,8 +1183,9 @@ class DockAppUpdater:
             pass
         
         self.log_message("All updates completed successfully", "INFO")
+        self.flush_logging()  # The session may auto-close right after this
         
-        self.refresh_apps()  # Refresh to show new versions
+        self.apply_version_deltas()  # Show new versions without a full rescan
         self.start_auto_close_timer()
         
     def update_failed(self, error):
@@ -735,7 +1208,7 @@ class DockAppUpdater:
             pass
             
         self.close_after_update = False
-        self.log_message(f"Update failed: {error}", "ERROR")
+        self.log_message("Update failed: %s", "ERROR", error)
         
         try:
             messagebox.showerror("Update Failed", f"Failed to update apps: {error}")
@@ -746,7 +1219,10 @@ class DockAppUpdater:
     def run(self):
         """Run the application"""
         self.log_message("Application started, performing initial app refresh", "INFO")
-        self.refresh_apps()  # Initial app refresh
+        # Show the last known list right away, then rescan once the window
+        # has been drawn
+        self.load_snapshot()
+        self.root.after_idle(self.refresh_apps)
         
         try:
             self.root.mainloop()
@@ -754,6 +1230,7 @@ class DockAppUpdater:
             self.log_message("Application interrupted by user", "INFO")
         finally:
             self.log_message("Application shutting down", "INFO")
+            self.flush_logging()
 
 
 if __name__ == "__main__":
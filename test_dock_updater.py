@@ -5,41 +5,55 @@ Test script for Dock App Updater
 
 import unittest
 import os
+import sys
+import types
 import tempfile
-import subprocess
+import shutil
+import queue
+import threading
+import plistlib
 from unittest.mock import patch, MagicMock
 
-# Import just the class without initializing GUI
-class MockDockAppUpdater:
-    """Mock version of DockAppUpdater for testing without GUI"""
+try:
+    import keyring
+    import keyring.backend
+    import keyring.errors
+except ImportError:
+    keyring = None
+    # dock_updater imports keyring at module level; these tests never call it
+    sys.modules.setdefault('keyring', types.ModuleType('keyring'))
+
+import dock_updater
+
+
+if keyring is not None:
+    class _MemoryKeyring(keyring.backend.KeyringBackend):
+        """In-process keyring so tests never touch the real Keychain"""
+        priority = 1
+        
+        def __init__(self):
+            super().__init__()
+            self._passwords = {}
+            
+        def set_password(self, service, username, password):
+            self._passwords[(service, username)] = password
+            
+        def get_password(self, service, username):
+            return self._passwords.get((service, username))
+            
+        def delete_password(self, service, username):
+            try:
+                del self._passwords[(service, username)]
+            except KeyError:
+                raise keyring.errors.PasswordDeleteError(username)
+
+
+class MockDockAppUpdater(dock_updater.DockAppUpdater):
+    """DockAppUpdater without the GUI; all other methods are the real ones"""
     
     def __init__(self):
         self.sudo_password = None
-        
-    def is_native_app(self, app_path):
-        """Check if app is native macOS app (simplified check)"""
-        native_paths = ['/System/', '/Applications/Utilities/', '/usr/']
-        native_apps = ['Finder', 'Safari', 'Mail', 'Calendar', 'Contacts', 'Maps', 
-                      'Photos', 'Messages', 'FaceTime', 'Music', 'TV', 'Podcasts',
-                      'News', 'Stocks', 'Home', 'Shortcuts', 'System Preferences']
-        
-        app_name = os.path.basename(app_path).replace('.app', '')
-        
-        return (any(app_path.startswith(path) for path in native_paths) or 
-                app_name in native_apps)
-                
-    def get_app_version(self, app_path):
-        """Get app version from Info.plist"""
-        try:
-            info_plist_path = os.path.join(app_path, 'Contents', 'Info.plist')
-            if os.path.exists(info_plist_path):
-                import plistlib
-                with open(info_plist_path, 'rb') as f:
-                    info_data = plistlib.load(f)
-                    return info_data.get('CFBundleShortVersionString', 'Unknown')
-            return 'Unknown'
-        except:
-            return 'Unknown'
+        self._tools = {}
 
 
 class TestDockAppUpdater(unittest.TestCase):
@@ -62,34 +76,227 @@ class TestDockAppUpdater(unittest.TestCase):
         self.assertFalse(self.app.is_native_app('/Applications/Chrome.app'))
         self.assertFalse(self.app.is_native_app('/Applications/VSCode.app'))
         
-    @patch('subprocess.run')
-    def test_package_manager_detection(self, mock_run):
+    def test_is_native_app_path_prefixes(self):
+        """Test that every native path prefix is recognised"""
+        self.assertTrue(self.app.is_native_app('/Applications/Utilities/Terminal.app'))
+        self.assertTrue(self.app.is_native_app('/usr/local/bin/SomeTool.app'))
+        self.assertFalse(self.app.is_native_app('/Users/me/System/Tool.app'))
+        
+    def test_is_native_app_trailing_slash(self):
+        """Test that Dock-style paths with a trailing slash are recognised"""
+        self.assertTrue(self.app.is_native_app('/Applications/Safari.app/'))
+        self.assertFalse(self.app.is_native_app('/Applications/Chrome.app/'))
+        
+    @patch('shutil.which')
+    def test_package_manager_detection(self, mock_which):
         """Test package manager detection"""
-        # Mock successful brew command
+        # Only brew is installed
+        mock_which.side_effect = lambda name: '/opt/homebrew/bin/brew' if name == 'brew' else None
+        
+        self.app.refresh_tools()
+        self.assertEqual(self.app._tools['brew'], '/opt/homebrew/bin/brew')
+        self.assertIsNone(self.app._tools['port'])
+        self.assertIsNone(self.app._tools['npm'])
+        
+    @patch('dock_updater.subprocess.Popen')
+    @patch('dock_updater.subprocess.run')
+    def test_sudo_calls_share_session_settings(self, mock_run, mock_popen):
+        """Test that sudo priming, keep-alive and port steps share a ticket key"""
         mock_run.return_value.returncode = 0
+        mock_popen.return_value.stdout = []
+        mock_popen.return_value.wait.return_value = 0
+        self.app.sudo_password = bytearray(b'secret')
+        self.app._cred_cache_valid = True
+        self.app._tools = {'port': '/opt/local/bin/port'}
+        self.app._stop_event = threading.Event()
+        self.app.update_processes = set()
+        self.app._ui_q = queue.Queue()
         
-        # Test that we can detect brew
-        result = subprocess.run(['which', 'brew'], capture_output=True, text=True)
-        # Just check that the function runs without error
-        self.assertIsNotNone(result)
+        self.assertTrue(self.app._update_macports())
+        self.app._refresh_sudo_ticket()
+        
+        prime, refresh = mock_run.call_args_list
+        self.assertEqual(prime[0][0], ['sudo', '-S', '-v'])
+        self.assertEqual(refresh[0][0], ['sudo', '-n', '-v'])
+        port_steps = mock_popen.call_args_list
+        self.assertEqual([call[0][0][:3] for call in port_steps],
+                         [['sudo', '-n', '/opt/local/bin/port']] * 2)
+        # sudo keys its ticket on the tty/session, so all must match
+        for call in [prime, refresh] + port_steps:
+            self.assertIs(call[1].get('start_new_session'), True)
+            
+    def test_brew_logs_only_completed_steps(self):
+        """Test that brew success is only logged for steps that finished"""
+        self.app._tools = {'brew': '/opt/homebrew/bin/brew'}
+        self.app._stop_event = threading.Event()
+        
+        def logged(returncode, stop=False):
+            self.app._ui_q = queue.Queue()
+            self.app._stop_event.clear()
+            if stop:
+                self.app._stop_event.set()
+            with patch.object(self.app, '_run_streaming', return_value=returncode):
+                self.app._update_brew()
+            return [event[1] for event in self.app._ui_q.queue][1:]
+        
+        self.assertEqual(logged(0), ["Homebrew updated successfully",
+                                     "Homebrew packages upgraded",
+                                     "Homebrew casks upgraded"])
+        self.assertEqual(logged(12)[-1], "Some cask upgrades failed (non-critical)")
+        # A force stop kills the shell mid-step
+        self.assertEqual(logged(-15, stop=True), [])
+        with self.assertRaisesRegex(Exception, "Homebrew upgrade failed"):
+            logged(11)
+        with self.assertRaises(Exception):
+            logged(-9)
+            
+    def test_brew_version_deltas(self):
+        """Test that brew upgrade lines update the matching app rows"""
+        self.app._version_deltas = {}
+        for line in ["==> Upgrading 2 outdated packages:",
+                     "visual-studio-code 1.84.0 -> 1.85.0",
+                     "==> Upgrading firefox 120.0 -> 121.0"]:
+            self.app._record_version_delta(line)
+        self.assertEqual(self.app._version_deltas,
+                         {'visualstudiocode': '1.85.0', 'firefox': '121.0'})
+        
+        rows = {'I001': {'name': 'Visual Studio Code', 'version': '1.84.0'},
+                'I002': {'name': 'Slack', 'version': '4.35.0'}}
+        
+        def tree_set(item, column, value=None):
+            if value is None:
+                return rows[item][column]
+            rows[item][column] = value
+        
+        self.app.app_tree = MagicMock()
+        self.app.app_tree.get_children.return_value = list(rows)
+        self.app.app_tree.set.side_effect = tree_set
+        self.app.log_message = MagicMock()
+        self.app.apply_version_deltas()
+        self.assertEqual(rows['I001']['version'], '1.85.0')
+        self.assertEqual(rows['I002']['version'], '4.35.0')
+            
+    @patch('dock_updater.messagebox.showerror')
+    def test_keychain_error_aborts_update(self, mock_showerror):
+        """Test that a keychain failure aborts the update with an error dialog"""
+        self.app.log_message = MagicMock()
+        self.app._stop_event = threading.Event()
+        self.app._stop_event.set()
+        with patch.object(self.app, '_get_sudo_password', side_effect=RuntimeError("locked")):
+            self.app.perform_updates(['Firefox'])
+        mock_showerror.assert_called_once()
+        self.app.log_message.assert_called_once()
+        self.assertEqual(self.app.log_message.call_args[0][1], "ERROR")
+        # Returned before the update state was reset
+        self.assertTrue(self.app._stop_event.is_set())
+            
+    def test_failed_refresh_keeps_snapshot(self):
+        """Test that a refresh that cannot read the dock doesn't overwrite the snapshot"""
+        self.app.log_message = MagicMock()
+        self.app.status_label = MagicMock()
+        self.app.progress = MagicMock()
+        self.app._ui_q = queue.Queue()
+        self.app._work_q = queue.Queue()
+        
+        # No Dock plist in this home directory
+        home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, home)
+        with patch.dict(os.environ, {'HOME': home}), \
+                patch.object(self.app, 'save_snapshot') as mock_save:
+            self.app.refresh_apps()
+            self.app._work_q.get_nowait()()
+        mock_save.assert_not_called()
+        self.assertEqual(self.app._ui_q.get_nowait()[1:], (self.app.update_app_list, []))
         
     def test_app_version_unknown(self):
         """Test app version detection with non-existent path"""
         version = self.app.get_app_version('/nonexistent/path')
         self.assertEqual(version, 'Unknown')
         
+    def test_app_version_cached_until_modified(self):
+        """Test that Info.plist is only re-parsed after it changes"""
+        app_path = tempfile.mkdtemp(suffix='.app')
+        self.addCleanup(shutil.rmtree, app_path)
+        os.makedirs(os.path.join(app_path, 'Contents'))
+        info_plist_path = os.path.join(app_path, 'Contents', 'Info.plist')
+        with open(info_plist_path, 'wb') as f:
+            plistlib.dump({'CFBundleShortVersionString': '1.0'}, f)
+            
+        self.assertEqual(self.app.get_app_version(app_path), '1.0')
+        hits = dock_updater._get_version.cache_info().hits
+        self.assertEqual(self.app.get_app_version(app_path), '1.0')
+        self.assertEqual(dock_updater._get_version.cache_info().hits, hits + 1)
+        
+        # A newer mtime misses the cache and picks up the new version
+        with open(info_plist_path, 'wb') as f:
+            plistlib.dump({'CFBundleShortVersionString': '2.0'}, f)
+        st = os.stat(info_plist_path)
+        os.utime(info_plist_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+        self.assertEqual(self.app.get_app_version(app_path), '2.0')
+        
+    def test_app_version_plist_formats(self):
+        """Test version lookup for binary, XML and entity-escaped plists"""
+        cases = [
+            (plistlib.FMT_BINARY, '3.1.4'),
+            (plistlib.FMT_XML, '3.1.4'),
+            (plistlib.FMT_XML, '1.0 R&D'),  # Escaped, so plistlib reads it
+        ]
+        for fmt, expected in cases:
+            data = plistlib.dumps({'CFBundleName': 'Test',
+                                   'CFBundleShortVersionString': expected}, fmt=fmt)
+            self.assertEqual(self.app.get_app_version(self._make_app(data)), expected)
+            
+        # A nested dict's version comes first in the XML; the top-level one wins
+        data = plistlib.dumps({'AHelper': {'CFBundleShortVersionString': '0.0.1-helper'},
+                               'CFBundleShortVersionString': '5.0'}, sort_keys=True)
+        self.assertLess(data.index(b'0.0.1-helper'), data.index(b'5.0'))
+        self.assertEqual(self.app.get_app_version(self._make_app(data)), '5.0')
+        # Same when only the nested value is simple enough for the regex
+        data = plistlib.dumps({'AHelper': {'CFBundleShortVersionString': '0.0.1-helper'},
+                               'CFBundleShortVersionString': '5.0 R&D'}, sort_keys=True)
+        self.assertEqual(self.app.get_app_version(self._make_app(data)), '5.0 R&D')
+        
+    def test_app_version_unreadable_plists(self):
+        """Test that empty and corrupt Info.plists report Unknown"""
+        # Empty files cannot be memory-mapped
+        self.assertEqual(self.app.get_app_version(self._make_app(b'')), 'Unknown')
+        # Binary magic skips the XML scan, even if the key text is present
+        data = b'bplist00<key>CFBundleShortVersionString</key><string>9.9</string>'
+        self.assertEqual(self.app.get_app_version(self._make_app(data)), 'Unknown')
+        # plistlib raises AttributeError rather than ValueError for a bad date
+        data = (b'<?xml version="1.0" encoding="UTF-8"?><plist version="1.0">'
+                b'<dict><key>Built</key><date>garbage</date></dict></plist>')
+        self.assertEqual(self.app.get_app_version(self._make_app(data)), 'Unknown')
+        # Well-formed plists whose root is not a dict
+        for root in (['3.0'], '3.0'):
+            for fmt in (plistlib.FMT_XML, plistlib.FMT_BINARY):
+                data = plistlib.dumps(root, fmt=fmt)
+                self.assertEqual(self.app.get_app_version(self._make_app(data)), 'Unknown')
+                
+    def _make_app(self, info_plist_data):
+        """Create a temporary app bundle with the given Info.plist contents"""
+        app_path = tempfile.mkdtemp(suffix='.app')
+        self.addCleanup(shutil.rmtree, app_path)
+        os.makedirs(os.path.join(app_path, 'Contents'))
+        with open(os.path.join(app_path, 'Contents', 'Info.plist'), 'wb') as f:
+            f.write(info_plist_data)
+        return app_path
+        
     def test_keyring_functionality(self):
         """Test keyring operations"""
-        try:
-            import keyring
-            # Test setting and getting a password
-            keyring.set_password('test_dock_app', 'test_user', 'test_pass')
-            retrieved = keyring.get_password('test_dock_app', 'test_user')
-            self.assertEqual(retrieved, 'test_pass')
-            # Clean up
-            keyring.delete_password('test_dock_app', 'test_user')
-        except Exception as e:
-            self.skipTest(f"Keyring not available: {e}")
+        if keyring is None:
+            self.skipTest("Keyring not available")
+        # Use an in-memory backend instead of the user's Keychain
+        self.addCleanup(keyring.set_keyring, keyring.get_keyring())
+        keyring.set_keyring(_MemoryKeyring())
+        
+        # Test setting and getting a password
+        keyring.set_password('test_dock_app', 'test_user', 'test_pass')
+        retrieved = keyring.get_password('test_dock_app', 'test_user')
+        self.assertEqual(retrieved, 'test_pass')
+        # Clean up
+        keyring.delete_password('test_dock_app', 'test_user')
+        self.assertIsNone(keyring.get_password('test_dock_app', 'test_user'))
 
 
 if __name__ == '__main__':